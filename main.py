@@ -1,17 +1,32 @@
 import os
+import re
 import json
+import time
+import signal
 import smtplib
 import requests
 import base64
+import functools
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from io import BytesIO
 from datetime import datetime, timezone, timedelta
+from email.message import Message
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
-from typing import Any, Dict, List, Tuple, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple, Optional, get_origin
 from dotenv import load_dotenv
-import matplotlib.pyplot as plt
-import seaborn as sns
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Plotting libraries are imported on first use in the chart helpers; most runs
+# send no alert and never draw a chart
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
 
 # === CONFIG HELPERS ===
 load_dotenv()
@@ -31,7 +46,7 @@ def efloat(key: str, default: float) -> float:
     v = os.getenv(key)
     try:
         return float(v) if v is not None else default
-    except:
+    except (ValueError, TypeError):
         return default
 
 
@@ -50,7 +65,7 @@ def eint(key: str, default: int) -> int:
     v = os.getenv(key)
     try:
         return int(v) if v is not None else default
-    except:
+    except (ValueError, TypeError):
         return default
 
 
@@ -85,23 +100,165 @@ def elist(key: str, default: List[str]) -> List[str]:
     return [x.strip() for x in raw.split(",")] if raw else default
 
 
-class C:
-    EMAIL_ADDRESS = estr("EMAIL_ADDRESS", "")
-    EMAIL_PASSWORD = estr("EMAIL_PASSWORD", "")
-    FRED_API_KEY = estr("FRED_API_KEY", "")
-    BTC_DOM_THRESHOLD = efloat("BTC_DOM_THRESHOLD", 45.0)
-    M2_FLAT_THRESHOLD = efloat("M2_FLAT_THRESHOLD", 0.001)
-    ALT_PULLBACK = efloat("ALT_PULLBACK", 0.90)
-    TRENDS_HITS_REQ = eint("TRENDS_HITS_REQ", 2)
-    SOCIAL_TERMS = elist(
-        "SOCIAL_TERMS", ["bitcoin", "crypto", "ethereum", "altcoin", "nft"]
-    )
-    APP_STORE_RSS = estr(
-        "APP_STORE_RSS",
-        "https://rss.applemarketingtools.com/api/v2/us/apps/top-free/10/apps.json",
+@dataclass(slots=True)
+class Config:
+    """Runtime settings, parsed once from the environment by load_config()."""
+
+    EMAIL_ADDRESS: str
+    EMAIL_PASSWORD: str
+    FRED_API_KEY: str
+    BTC_DOM_THRESHOLD: float
+    M2_FLAT_THRESHOLD: float
+    ALT_PULLBACK: float
+    TRENDS_HITS_REQ: int
+    SOCIAL_TERMS: List[str]
+    APP_STORE_RSS: str
+    FEAR_GREED_API: str
+    HISTORY_FILE: str
+    HTTP_CACHE_FILE: str
+    INTERVAL_SECONDS: int
+
+
+def load_config() -> Config:
+    """
+    Builds the configuration from environment variables.
+
+    Returns:
+    A Config with every setting coerced to its type, using the default for any
+    variable that is unset or invalid.
+    """
+    return Config(
+        EMAIL_ADDRESS=estr("EMAIL_ADDRESS", ""),
+        EMAIL_PASSWORD=estr("EMAIL_PASSWORD", ""),
+        FRED_API_KEY=estr("FRED_API_KEY", ""),
+        BTC_DOM_THRESHOLD=efloat("BTC_DOM_THRESHOLD", 45.0),
+        M2_FLAT_THRESHOLD=efloat("M2_FLAT_THRESHOLD", 0.001),
+        ALT_PULLBACK=efloat("ALT_PULLBACK", 0.90),
+        TRENDS_HITS_REQ=eint("TRENDS_HITS_REQ", 2),
+        SOCIAL_TERMS=elist(
+            "SOCIAL_TERMS", ["bitcoin", "crypto", "ethereum", "altcoin", "nft"]
+        ),
+        APP_STORE_RSS=estr(
+            "APP_STORE_RSS",
+            "https://rss.applemarketingtools.com/api/v2/us/apps/top-free/10/apps.json",
+        ),
+        FEAR_GREED_API=estr(
+            "FEAR_GREED_API", "https://api.alternative.me/fng/?limit=1"
+        ),
+        HISTORY_FILE=estr("HISTORY_FILE", "alt_history.json"),
+        HTTP_CACHE_FILE=estr("HTTP_CACHE_FILE", ".http_cache.json"),
+        INTERVAL_SECONDS=eint("INTERVAL_SECONDS", 0),
     )
-    FEAR_GREED_API = estr("FEAR_GREED_API", "https://api.alternative.me/fng/?limit=1")
-    HISTORY_FILE = estr("HISTORY_FILE", "alt_history.json")
+
+
+C = load_config()
+
+
+# === HTTP CACHE ===
+# Maps "<fetcher>:<args>" to [value, expires_at]; loaded lazily from disk so
+# cached values survive between scheduled runs.
+_http_cache: Optional[Dict[str, List[Any]]] = None
+_http_cache_lock = threading.Lock()
+
+
+def _load_http_cache() -> Dict[str, List[Any]]:
+    """Load the persisted HTTP cache from disk on first use."""
+    global _http_cache
+    if _http_cache is None:
+        try:
+            with open(C.HTTP_CACHE_FILE) as f:
+                _http_cache = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            _http_cache = {}
+    return _http_cache
+
+
+def _save_http_cache(cache: Dict[str, List[Any]]) -> None:
+    """Atomically write the unexpired HTTP cache entries to disk."""
+    now = time.time()
+    live = {k: v for k, v in cache.items() if v[1] > now}
+    tmp = f"{C.HTTP_CACHE_FILE}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(live, f)
+        os.replace(tmp, C.HTTP_CACHE_FILE)
+    except OSError as e:
+        print(f"Error saving HTTP cache: {e}")
+
+
+def ttl_cache(seconds: float) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Caches a fetcher's return value for a fixed time-to-live.
+
+    Args:
+    seconds: How long a cached value is considered fresh.
+
+    Returns:
+    A decorator that returns the cached value while it is fresh and otherwise
+    calls the wrapped function and stores its result. Exceptions are not cached.
+    The cache is persisted to C.HTTP_CACHE_FILE so repeat runs within the TTL
+    skip the HTTP round-trip entirely.
+
+    Only wrap functions that raise on failure and whose result depends on nothing
+    but their arguments: a fallback value returned on error, or a result shaped
+    by configuration, would be cached as if it were fresh data. JSON turns tuples
+    into lists, so functions annotated to return a tuple get one back on a hit.
+    """
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        hints = getattr(fn, "__annotations__", {})
+        returns_tuple = get_origin(hints.get("return")) is tuple
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = f"{fn.__name__}:{args!r}:{kwargs!r}"
+            with _http_cache_lock:
+                hit = _load_http_cache().get(key)
+            if hit is not None and hit[1] > time.time():
+                return tuple(hit[0]) if returns_tuple else hit[0]
+
+            value = fn(*args, **kwargs)
+            with _http_cache_lock:
+                cache = _load_http_cache()
+                cache[key] = [value, time.time() + seconds]
+                _save_http_cache(cache)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+# === HTTP SESSION ===
+# One pooled session for all fetchers so keep-alive connections (and their TLS
+# handshakes) are reused across requests and threads.
+SESSION = requests.Session()
+SESSION.headers["User-Agent"] = "crypto-market-monitor"
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=2, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504]
+    ),
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+
+
+def fetch_concurrently(fetchers: Dict[str, Callable[[], Any]]) -> Dict[str, Future]:
+    """
+    Runs independent fetchers in parallel and waits for all of them.
+
+    Args:
+    fetchers: A mapping of result names to zero-argument fetcher functions.
+
+    Returns:
+    A mapping of the same names to completed futures. Calling result() on a
+    future returns the fetcher's value or re-raises its exception, so each
+    caller decides how to handle a failed source.
+    """
+    with ThreadPoolExecutor(max_workers=len(fetchers) or 1) as ex:
+        return {name: ex.submit(fn) for name, fn in fetchers.items()}
 
 
 # === HISTORY TRACKING ===
@@ -113,46 +270,92 @@ class IndicatorHistory:
     def __init__(self, history_file: str = "indicator_history.json"):
         self.history_file = history_file
         self.data = self._load_history()
+        self.dirty = False
+
+    def _load_history(self) -> Dict[str, Dict[str, float]]:
+        """
+        Load historical data from the JSON file.
 
-    def _load_history(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load historical data from the JSON file."""
+        Each indicator maps ISO dates to values, kept in ascending date order so
+        readers can slice from the end without sorting. Files written by earlier
+        versions store each indicator as a list of {"date", "value"} entries;
+        those are converted on load and saved in the new shape on the next flush.
+        """
         if os.path.exists(self.history_file):
             try:
                 with open(self.history_file) as f:
-                    return json.load(f)
+                    data = json.load(f)
             except json.JSONDecodeError:
                 return {}
+            return {
+                indicator: dict(
+                    sorted(
+                        ((e["date"], e["value"]) for e in series)
+                        if isinstance(series, list)
+                        else series.items()
+                    )
+                )
+                for indicator, series in data.items()
+            }
         return {}
 
     def _save_history(self) -> None:
-        """Save historical data to the JSON file."""
-        with open(self.history_file, "w") as f:
-            json.dump(self.data, f, indent=2)
+        """Atomically save historical data to the JSON file if it has changed."""
+        if not self.dirty:
+            return
+        tmp = f"{self.history_file}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, separators=(",", ":"))
+        os.replace(tmp, self.history_file)
+        self.dirty = False
+
+    def flush(self) -> None:
+        """Write any buffered datapoints to the history file."""
+        self._save_history()
 
     def add_datapoint(self, indicator: str, value: float) -> None:
         """
         Add a new datapoint for an indicator.
 
+        The change is kept in memory until flush() is called, so several
+        datapoints can be recorded with a single file write.
+
         Args:
             indicator: The name of the indicator
             value: The value of the indicator
         """
-        today = datetime.now(timezone.utc).date().isoformat()
+        self.update_many({indicator: value})
 
-        if indicator not in self.data:
-            self.data[indicator] = []
+    def update_many(self, values: Dict[str, float]) -> None:
+        """
+        Add today's datapoint for several indicators at once.
+
+        Like add_datapoint, the changes are kept in memory until flush().
+
+        Args:
+            values: Mapping of indicator names to today's values
+        """
+        if not values:
+            return
+        today = datetime.now(timezone.utc).date().isoformat()
+        for indicator, value in values.items():
+            self._upsert(indicator, today, value)
+        self.dirty = True
 
-        # Remove today's entry if it exists
-        self.data[indicator] = [e for e in self.data[indicator] if e["date"] != today]
+    def _upsert(self, indicator: str, date: str, value: float) -> None:
+        """Set one dated value, keeping the series ordered and at most 90 days."""
+        series = self.data.setdefault(indicator, {})
 
-        # Add new entry
-        self.data[indicator].append({"date": today, "value": value})
+        # Add or replace the entry; a new day normally lands at the end,
+        # so the map only needs re-sorting if the clock has gone backwards
+        out_of_order = date not in series and series and date < next(reversed(series))
+        series[date] = value
+        if out_of_order:
+            series = self.data[indicator] = dict(sorted(series.items()))
 
         # Keep only the last 90 days
-        self.data[indicator] = self.data[indicator][-90:]
-
-        # Save to file
-        self._save_history()
+        while len(series) > 90:
+            del series[next(iter(series))]
 
     def get_history(self, indicator: str, days: int = 30) -> List[Dict[str, Any]]:
         """
@@ -168,10 +371,43 @@ class IndicatorHistory:
         if indicator not in self.data:
             return []
 
-        return sorted(self.data[indicator][-days:], key=lambda x: x["date"])
+        recent = list(self.data[indicator].items())[-days:]
+        return [{"date": date, "value": value} for date, value in recent]
 
 
 # === CHART GENERATION ===
+_FIG: Optional["Figure"] = None
+_AX: Optional["Axes"] = None
+
+
+def _chart_axes() -> "Axes":
+    """
+    Return the shared chart Axes, cleared and ready to draw on.
+
+    The Figure is created (and the seaborn style applied) only on first use;
+    later charts reuse it instead of building a new figure each time.
+    """
+    global _FIG, _AX
+    if _FIG is None:
+        import matplotlib
+
+        # seaborn imports pyplot; pin it to Agg so it never probes for a display
+        matplotlib.use("Agg")
+        import seaborn as sns
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        sns.set_style("darkgrid")
+        _FIG = Figure(figsize=(10, 6))
+        FigureCanvasAgg(_FIG)
+        # Fixed margins with room for rotated dates, so charts never need a
+        # measuring layout pass before the real draw
+        _FIG.subplots_adjust(left=0.09, right=0.97, top=0.92, bottom=0.18)
+        _AX = _FIG.add_subplot()
+    _AX.clear()
+    return _AX
+
+
 def create_chart(
     history_data: List[Dict[str, Any]], title: str, y_label: str
 ) -> BytesIO:
@@ -186,74 +422,157 @@ def create_chart(
     Returns:
         BytesIO object containing the chart image
     """
+    # _chart_axes pins the Agg backend, so it must run before the other
+    # plotting imports (seaborn pulls in pyplot).
+    ax = _chart_axes()
+
+    import matplotlib.dates as mdates
+    import numpy as np
+    import seaborn as sns
+    from PIL import Image
+
     if not history_data:
         # Create empty chart with message if no data
-        plt.figure(figsize=(10, 6))
-        plt.title(title)
-        plt.text(
+        ax.set_title(title)
+        ax.text(
             0.5,
             0.5,
             "No historical data available",
             horizontalalignment="center",
             verticalalignment="center",
-            transform=plt.gca().transAxes,
+            transform=ax.transAxes,
+        )
+    else:
+        # Extract dates and values; NumPy parses the ISO dates in one pass and
+        # matplotlib plots datetime64 directly
+        dates = np.array([d["date"] for d in history_data], dtype="datetime64[D]")
+        values = np.fromiter(
+            (d["value"] for d in history_data), dtype=np.float64, count=len(dates)
         )
-        plt.tight_layout()
 
-        img_data = BytesIO()
-        plt.savefig(img_data, format="png")
-        img_data.seek(0)
-        plt.close()
-        return img_data
+        # Plot the data
+        sns.lineplot(x=dates, y=values, marker="o", ax=ax)
 
-    # Extract dates and values
-    dates = [datetime.fromisoformat(d["date"]) for d in history_data]
-    values = [d["value"] for d in history_data]
+        # Set labels and title
+        ax.set_title(title, fontsize=16)
+        ax.set_xlabel("Date", fontsize=12)
+        ax.set_ylabel(y_label, fontsize=12)
 
-    # Create the chart
-    plt.figure(figsize=(10, 6))
-    sns.set_style("darkgrid")
+        # Format x-axis dates
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=8))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
+        for label in ax.get_xticklabels():
+            label.set_rotation(30)
+            label.set_horizontalalignment("right")
 
-    # Plot the data
-    ax = sns.lineplot(x=dates, y=values, marker="o")
+        # Add grid
+        ax.grid(True, linestyle="--", alpha=0.7)
 
-    # Set labels and title
-    plt.title(title, fontsize=16)
-    plt.xlabel("Date", fontsize=12)
-    plt.ylabel(y_label, fontsize=12)
+    # Render with Agg and encode the RGBA buffer straight to PNG
+    canvas = _FIG.canvas
+    canvas.draw()
+    img_data = BytesIO()
+    Image.frombuffer(
+        "RGBA",
+        canvas.get_width_height(physical=True),
+        canvas.buffer_rgba(),
+        "raw",
+        "RGBA",
+        0,
+        1,
+    ).save(img_data, "PNG", compress_level=1)
+    img_data.seek(0)
 
-    # Format x-axis dates
-    plt.gcf().autofmt_xdate()
+    return img_data
 
-    # Add grid
-    plt.grid(True, linestyle="--", alpha=0.7)
 
-    # Tight layout
-    plt.tight_layout()
+# (indicator, attachment name, chart title, y-axis label)
+CHARTS = (
+    (
+        "btc_dominance",
+        "Bitcoin Dominance (%)",
+        "Bitcoin Dominance Over Time",
+        "BTC Dominance (%)",
+    ),
+    (
+        "eth_dominance",
+        "Ethereum Dominance (%)",
+        "Ethereum Dominance Over Time",
+        "ETH Dominance (%)",
+    ),
+    ("alt_ratio", "Altcoin Ratio", "Altcoin Ratio Over Time", "Ratio"),
+    ("m2_latest", "M2 Money Supply", "M2 Money Supply Over Time", "M2 Value"),
+    (
+        "fear_greed",
+        "Fear & Greed Index",
+        "Fear & Greed Index Over Time",
+        "Index Value",
+    ),
+)
+
+
+def build_charts(history: IndicatorHistory) -> Dict[str, BytesIO]:
+    """
+    Renders a chart for every tracked indicator that has history.
 
-    # Save to BytesIO
-    img_data = BytesIO()
-    plt.savefig(img_data, format="png")
-    img_data.seek(0)
-    plt.close()
+    Args:
+    history: Indicator history to chart.
 
-    return img_data
+    Returns:
+    Dictionary mapping attachment names to PNG chart images.
+    """
+    charts = {}
+    for indicator, name, title, y_label in CHARTS:
+        data = history.get_history(indicator)
+        if data:
+            charts[name] = create_chart(data, title, y_label)
+    return charts
 
 
 # === EMAIL SENDER ===
-def send_email(
-    subject: str, body: str, charts: Optional[Dict[str, BytesIO]] = None
-) -> None:
+def chart_images(charts: Dict[str, BytesIO]) -> Dict[str, MIMEImage]:
     """
-    Sends an email with the specified subject, body, and optional charts to the configured email address.
+    Encodes charts as inline email images.
+
+    Args:
+    charts: Dictionary mapping chart IDs to BytesIO objects containing chart images.
+
+    Returns:
+    Dictionary mapping chart IDs to base64-encoded MIMEImage parts with Content-IDs.
+
+    Messages hold no reference back to their parent, so the returned parts can be
+    attached to several emails and each chart is only encoded once per run.
+    """
+    images = {}
+    for chart_id, chart_data in charts.items():
+        content_id = f"{chart_id.lower().replace(' ', '_')}"
+        # Encode straight from the chart's buffer; the subtype is known,
+        # so MIMEImage does not need to sniff the image header either
+        img = MIMEImage(chart_data.getbuffer(), "png")
+        img.add_header("Content-ID", f"<{content_id}>")
+        img.add_header("Content-Disposition", "inline", filename=f"{content_id}.png")
+        images[chart_id] = img
+    return images
+
+
+def build_email(
+    subject: str,
+    body: str,
+    charts: Optional[Dict[str, BytesIO]] = None,
+    images: Optional[Dict[str, MIMEImage]] = None,
+) -> Message:
+    """
+    Builds an alert email addressed to and from the configured email address.
 
     Args:
     subject: The subject line of the email.
     body: The body content of the email.
     charts: Optional dictionary mapping chart IDs to BytesIO objects containing chart images.
+    images: Optional parts already encoded from charts by chart_images(), so emails
+            sharing the same charts do not encode them again.
 
-    This function uses the SMTP protocol to send an email via Gmail's SMTP server.
-    It requires the EMAIL_ADDRESS and EMAIL_PASSWORD to be set in the configuration.
+    Returns:
+    A plain text message, or a multipart HTML message with the charts embedded inline.
     """
     # For test compatibility, use simple MIMEText if no charts
     # This ensures tests that check email_msg.get_payload() for the body text still work
@@ -278,8 +597,11 @@ def send_email(
             plain_part = MIMEText(body, "plain")
             alt_part.attach(plain_part)
 
-            # Start HTML content
-            html_content = f"""
+            body_html = body.replace("\n", "<br>")
+            alert_class = "danger" if "FULL EXIT" in subject else "warning"
+
+            # Collect the HTML in parts and join once at the end
+            parts = [f"""
             <html>
             <head>
                 <style>
@@ -294,12 +616,12 @@ def send_email(
             </head>
             <body>
                 <div class="container">
-                    <div class="alert {'danger' if 'FULL EXIT' in subject else 'warning'}">
+                    <div class="alert {alert_class}">
                         <h2>{subject}</h2>
-                        <p>{body.replace('\n', '<br>')}</p>
+                        <p>{body_html}</p>
                     </div>
                     <h2>Market Indicators - Historical Charts</h2>
-            """
+            """]
 
             # Add each chart to HTML content
             for chart_id, chart_data in charts.items():
@@ -307,19 +629,20 @@ def send_email(
                 content_id = f"{chart_id.lower().replace(' ', '_')}"
 
                 # Add to HTML using Content-ID reference
-                html_content += f"""
+                parts.append(f"""
                     <div class="chart">
                         <h3>{chart_id}</h3>
                         <img src="cid:{content_id}" alt="{chart_id}" style="max-width:100%;">
                     </div>
-                """
+                """)
 
             # Close HTML
-            html_content += """
+            parts.append("""
                 </div>
             </body>
             </html>
-            """
+            """)
+            html_content = "".join(parts)
 
             # Attach HTML content to the alternative part
             html_part = MIMEText(html_content, "html")
@@ -329,26 +652,54 @@ def send_email(
             msg.attach(alt_part)
 
             # Now attach all images with proper Content-IDs
-            for chart_id, chart_data in charts.items():
-                content_id = f"{chart_id.lower().replace(' ', '_')}"
-                img = MIMEImage(chart_data.getvalue())
-                img.add_header("Content-ID", f"<{content_id}>")
-                img.add_header(
-                    "Content-Disposition", "inline", filename=f"{content_id}.png"
-                )
+            if images is None:
+                images = chart_images(charts)
+            for img in images.values():
                 msg.attach(img)
         else:
             # Plain text email
             msg.attach(MIMEText(body, "plain"))
 
-    # Send the email
+    return msg
+
+
+def send_emails(messages: List[Message]) -> None:
+    """
+    Sends several emails over a single SMTP session.
+
+    Args:
+    messages: The messages to send, in order.
+
+    This function uses the SMTP protocol to send the emails via Gmail's SMTP server,
+    paying for the STARTTLS handshake and login only once however many alerts fire.
+    It requires the EMAIL_ADDRESS and EMAIL_PASSWORD to be set in the configuration.
+    """
     with smtplib.SMTP("smtp.gmail.com", 587, timeout=10) as s:
         s.starttls()
         s.login(C.EMAIL_ADDRESS, C.EMAIL_PASSWORD)
-        s.send_message(msg)
+        for msg in messages:
+            s.send_message(msg)
+
+
+def send_email(
+    subject: str, body: str, charts: Optional[Dict[str, BytesIO]] = None
+) -> None:
+    """
+    Sends an email with the specified subject, body, and optional charts to the configured email address.
+
+    Args:
+    subject: The subject line of the email.
+    body: The body content of the email.
+    charts: Optional dictionary mapping chart IDs to BytesIO objects containing chart images.
+
+    This function uses the SMTP protocol to send an email via Gmail's SMTP server.
+    It requires the EMAIL_ADDRESS and EMAIL_PASSWORD to be set in the configuration.
+    """
+    send_emails([build_email(subject, body, charts)])
 
 
 # === FETCHERS & UTILS ===
+@ttl_cache(5 * 60)
 def get_coingecko_global() -> Tuple[float, float, float]:
     """
     Fetches the global market cap data from CoinGecko API.
@@ -357,7 +708,7 @@ def get_coingecko_global() -> Tuple[float, float, float]:
     A tuple of three floats: Bitcoin's market cap percentage, Ethereum's market cap percentage,
     and the total market cap in USD.
     """
-    r = requests.get("https://api.coingecko.com/api/v3/global", timeout=10)
+    r = SESSION.get("https://api.coingecko.com/api/v3/global", timeout=10)
     r.raise_for_status()
     d = r.json()["data"]
     return (
@@ -367,39 +718,62 @@ def get_coingecko_global() -> Tuple[float, float, float]:
     )
 
 
-def get_fear_greed() -> int:
+_FEAR_GREED_VALUE_RE = re.compile(rb'"value"\s*:\s*"(\d+)"')
+
+
+@ttl_cache(60 * 60)
+def get_fear_greed(url: str) -> int:
     """
     Fetches the current Fear & Greed Index value from an external API.
 
+    Args:
+    url: The URL of the Fear & Greed Index API.
+
     Returns:
     An integer representing the Fear & Greed Index value.
 
     Raises:
     HTTPError: If the HTTP request to the API fails or returns an error status.
+    ValueError: If the response does not contain an index value.
     """
-    r = requests.get(C.FEAR_GREED_API, timeout=10)
+    r = SESSION.get(url, timeout=10)
     r.raise_for_status()
-    return int(r.json()["data"][0]["value"])
+    # The first "value" field is data[0].value, so scan for it instead of
+    # building the whole JSON document
+    m = _FEAR_GREED_VALUE_RE.search(r.content)
+    if m is None:
+        raise ValueError("Fear & Greed response has no value field")
+    return int(m.group(1))
 
 
+@ttl_cache(24 * 60 * 60)
 def get_m2_series() -> List[float]:
     """
     Fetches the M2 money supply series from the Federal Reserve Economic Data (FRED) API.
 
+    Only the most recent observations are requested (newest first), since
+    callers only look at the tail of the series.
+
     Returns:
-    A list of floats representing the M2 money supply values.
+    A list of floats representing the M2 money supply values, oldest first.
 
     Raises:
     HTTPError: If the HTTP request to the API fails or returns an error status.
     """
-    url = (
-        f"https://api.stlouisfed.org/fred/series/observations"
-        f"?series_id=M2NS&api_key={C.FRED_API_KEY}&file_type=json"
+    r = SESSION.get(
+        "https://api.stlouisfed.org/fred/series/observations",
+        params={
+            "series_id": "M2NS",
+            "api_key": C.FRED_API_KEY,
+            "file_type": "json",
+            "sort_order": "desc",
+            "limit": 12,
+        },
+        timeout=10,
     )
-    r = requests.get(url, timeout=10)
     r.raise_for_status()
     obs = r.json()["observations"]
-    return [float(o["value"]) for o in obs if o["value"] != "."]
+    return [float(o["value"]) for o in reversed(obs) if o["value"] != "."]
 
 
 def is_m2_flat(vals: List[float]) -> bool:
@@ -421,32 +795,99 @@ def is_m2_flat(vals: List[float]) -> bool:
     return abs(delta) < C.M2_FLAT_THRESHOLD
 
 
+def _read_history() -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Reads the last 90 historical data points from the JSON Lines history file.
+
+    Returns:
+    A tuple of the data points (oldest first) and a flag that is True when the
+    file should be rewritten, either because it is still a legacy JSON array,
+    because more than 200 lines have been appended since it was last compacted,
+    or because its last line was left half-written and has been dropped.
+    """
+    if not os.path.exists(C.HISTORY_FILE):
+        return [], False
+    with open(C.HISTORY_FILE) as f:
+        if f.read(1) == "[":
+            # Legacy format: the whole history as a single JSON array
+            f.seek(0)
+            return json.load(f)[-90:], True
+        f.seek(0)
+        tail: deque = deque(maxlen=90)
+        lines = 0
+        for line in f:
+            if line.strip():
+                tail.append(line)
+                lines += 1
+    if not tail:
+        return [], False
+    *complete, last = tail
+    hist = [json.loads(line) for line in complete]
+    try:
+        hist.append(json.loads(last))
+    except json.JSONDecodeError:
+        # An interrupted write leaves a partial last line; drop it and have the
+        # caller rewrite the file
+        return hist, True
+    return hist, lines > 200
+
+
 def load_history() -> List[Dict[str, Any]]:
     """
-    Loads a list of historical data points from a JSON file.
+    Loads the last 90 historical data points from the history file.
 
     Returns:
     A list of dictionaries, where each dictionary represents a data point with a "date" key
-    and a "ratio" key. The list is sorted by date in descending order. If the file does not
+    and a "ratio" key. The list is sorted by date in ascending order. If the file does not
     exist, an empty list is returned.
     """
-    if os.path.exists(C.HISTORY_FILE):
-        with open(C.HISTORY_FILE) as f:
-            return json.load(f)
-    return []
+    return _read_history()[0]
 
 
 def save_history(h: List[Dict[str, Any]]) -> None:
     """
-    Saves the last 90 historical data points to a JSON file.
+    Rewrites the history file with the last 90 historical data points, one JSON object per line.
 
     Args:
     h: A list of dictionaries, where each dictionary represents a data point with a "date" key
-       and a "ratio" key. The list is sorted by date in descending order.
+       and a "ratio" key. The list is sorted by date in ascending order.
 
     """
     with open(C.HISTORY_FILE, "w") as f:
-        json.dump(h[-90:], f, indent=2)
+        f.writelines(json.dumps(e, separators=(",", ":")) + "\n" for e in h[-90:])
+
+
+def append_history(entry: Dict[str, Any]) -> None:
+    """
+    Appends a single historical data point to the history file.
+
+    Args:
+    entry: A dictionary with a "date" key and a "ratio" key.
+    """
+    with open(C.HISTORY_FILE, "a") as f:
+        f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def replace_last_history(entry: Dict[str, Any]) -> None:
+    """
+    Overwrites the last data point in the history file in place.
+
+    Args:
+    entry: A dictionary with a "date" key and a "ratio" key.
+
+    Only the final line is rewritten, so repeat runs on the same day do not
+    rewrite the rest of the file. The new line is written over the old one
+    before the file is truncated to its end, so the file is never shorter than
+    the new entry. This is not atomic: a crash mid-write can still leave a
+    partial last line, which _read_history drops so the next run rewrites it.
+    """
+    with open(C.HISTORY_FILE, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - 4096))
+        tail = f.read()
+        f.seek(size - len(tail) + tail.rstrip(b"\n").rfind(b"\n") + 1)
+        f.write(json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+        f.truncate()
 
 
 def check_alt_pullback(ratio: float) -> bool:
@@ -462,19 +903,77 @@ def check_alt_pullback(ratio: float) -> bool:
     a configured threshold of the highest ratio observed in the recent period.
 
     The function maintains a historical record of ratios, updating it with the
-    current day's data and preserving only the last 90 entries.
+    current day's data and preserving only the last 90 entries. A new day costs
+    a single appended line and a repeat run on the same day overwrites only the
+    last line; the whole file is only rewritten when it needs compacting.
     """
 
-    hist = load_history()
+    hist, needs_rewrite = _read_history()
     today = datetime.now(timezone.utc).date().isoformat()
-    hist = [e for e in hist if e["date"] != today]
-    hist.append({"date": today, "ratio": ratio})
-    save_history(hist)
+    entry = {"date": today, "ratio": ratio}
+    if needs_rewrite or any(e["date"] == today for e in hist[:-1]):
+        hist = [e for e in hist if e["date"] != today]
+        hist.append(entry)
+        save_history(hist)
+    elif hist and hist[-1]["date"] == today:
+        hist[-1] = entry
+        replace_last_history(entry)
+    else:
+        hist.append(entry)
+        append_history(entry)
     recent = hist[-30:]
     high = max(e["ratio"] for e in recent) if recent else ratio
     return len(recent) > 5 and ratio < high * C.ALT_PULLBACK
 
 
+@functools.lru_cache(maxsize=8)
+def _social_terms_pattern(terms: Tuple[str, ...]) -> re.Pattern:
+    """
+    Compiles the social terms into one case-insensitive pattern.
+
+    Args:
+    terms: The configured social terms.
+
+    Returns:
+    A pattern matching any of the terms, compiled once per distinct
+    configuration so each topic is scanned once instead of once per term.
+    """
+    if not terms:
+        # An empty alternation would match everything
+        return re.compile(r"(?!)")
+    return re.compile("|".join(map(re.escape, terms)), re.IGNORECASE)
+
+
+@ttl_cache(60 * 60)
+def get_trending_searches() -> List[str]:
+    """
+    Fetches today's trending search queries from Google Trends.
+
+    Returns:
+    The list of trending search queries, or an empty list if the response holds
+    no trends. Request and parse errors are raised, so they are never cached.
+    """
+    r = SESSION.get(
+        "https://trends.google.com/trends/api/dailytrends",
+        params={"hl": "en-US", "tz": "-480", "geo": "US", "ns": "15"},
+        timeout=10,
+    )
+    r.raise_for_status()
+    # Skip the XSSI prefix on the raw bytes; json decodes UTF-8 itself, so
+    # requests never has to guess the charset and build r.text
+    body = r.content
+    idx = body.find(b"{")
+    if idx < 0:
+        return []
+    jd = json.loads(body[idx:])
+    days = jd.get("default", {}).get("trendingSearchesDays", [])
+    if not days:
+        return []
+    return [
+        e.get("title", {}).get("query", "") for e in days[0].get("trendingSearches", [])
+    ]
+
+
 def google_trends_hype() -> bool:
     """
     Checks if the current Google Trends list indicates hype.
@@ -488,34 +987,45 @@ def google_trends_hype() -> bool:
     social terms list. The function returns True if the number of hits is
     at least the configured threshold, and False otherwise.
 
+    Only the fetched queries are cached, so configuration changes apply on the
+    next run and a failed request is retried instead of cached as False.
     """
     try:
-        r = requests.get(
-            "https://trends.google.com/trends/api/dailytrends",
-            params={"hl": "en-US", "tz": "-480", "geo": "US", "ns": "15"},
-            timeout=10,
-        )
-        r.raise_for_status()
-        txt = r.text
-        idx = txt.find("{")
-        if idx < 0:
-            return False
-        jd = json.loads(txt[idx:])
-        days = jd.get("default", {}).get("trendingSearchesDays", [])
-        if not days:
-            return False
-        topics = [
-            e.get("title", {}).get("query", "")
-            for e in days[0].get("trendingSearches", [])
-        ]
-        hits = sum(
-            any(term.lower() in t.lower() for term in C.SOCIAL_TERMS) for t in topics
-        )
+        topics = get_trending_searches()
+        pattern = _social_terms_pattern(tuple(C.SOCIAL_TERMS))
+        hits = 0
+        for t in topics:
+            if pattern.search(t):
+                hits += 1
+                # Stop scanning as soon as the threshold is reached
+                if hits >= C.TRENDS_HITS_REQ:
+                    return True
         return hits >= C.TRENDS_HITS_REQ
-    except:
+    except (requests.RequestException, ValueError, KeyError, AttributeError, TypeError):
         return False
 
 
+@ttl_cache(60 * 60)
+def get_app_store_names(url: str) -> List[str]:
+    """
+    Fetches the app names from an App Store RSS feed.
+
+    Args:
+    url: The URL of the JSON feed.
+
+    Returns:
+    The app names in the feed. The feed is only parsed when "coinbase" appears
+    somewhere in the raw body; otherwise an empty list is returned. Request and
+    parse errors are raised, so they are never cached.
+    """
+    r = SESSION.get(url, timeout=10)
+    r.raise_for_status()
+    body = r.content
+    if b"coinbase" not in body.lower():
+        return []
+    return [a["name"] for a in json.loads(body)["feed"]["results"]]
+
+
 def coinbase_app_top() -> bool:
     """
     Checks if the Coinbase app is currently trending in the Apple App Store.
@@ -530,11 +1040,9 @@ def coinbase_app_top() -> bool:
 
     """
     try:
-        r = requests.get(C.APP_STORE_RSS, timeout=10)
-        r.raise_for_status()
-        apps = r.json()["feed"]["results"]
-        return any("coinbase" in a["name"].lower() for a in apps)
-    except:
+        names = get_app_store_names(C.APP_STORE_RSS)
+        return any("coinbase" in name.lower() for name in names)
+    except (requests.RequestException, ValueError, KeyError, TypeError):
         return False
 
 
@@ -546,8 +1054,7 @@ def migrate_alt_history() -> None:
     if os.path.exists(C.HISTORY_FILE) and not os.path.exists("indicator_history.json"):
         try:
             # Load old history
-            with open(C.HISTORY_FILE) as f:
-                old_history = json.load(f)
+            old_history = load_history()
 
             # Create new history object
             history = IndicatorHistory()
@@ -559,7 +1066,7 @@ def migrate_alt_history() -> None:
                     history.add_datapoint("alt_ratio", entry["ratio"])
 
             # Save new history
-            history._save_history()
+            history.flush()
 
             print(
                 f"Successfully migrated data from {C.HISTORY_FILE} to indicator_history.json"
@@ -599,121 +1106,159 @@ def main() -> None:
     # Track triggers
     trig: List[str] = []
 
+    # Fetch all market data concurrently; total latency is the slowest call
+    market = fetch_concurrently(
+        {
+            "global": get_coingecko_global,
+            "m2": get_m2_series,
+            "fg": lambda: get_fear_greed(C.FEAR_GREED_API),
+        }
+    )
+
     # Get market data
-    btc, eth, tot = get_coingecko_global()
+    btc, eth, tot = market["global"].result()
     others = tot * (100 - btc - eth) / 100
     ratio = others / tot
 
-    # Store data points in history
-    history.add_datapoint("btc_dominance", btc)
-    history.add_datapoint("eth_dominance", eth)
-    history.add_datapoint("total_market_cap", tot)
-    history.add_datapoint("alt_ratio", ratio)
+    # Collect today's data points for history
+    datapoints = {
+        "btc_dominance": btc,
+        "eth_dominance": eth,
+        "total_market_cap": tot,
+        "alt_ratio": ratio,
+    }
 
     # Get M2 data
     try:
-        m2 = get_m2_series()
+        m2 = market["m2"].result()
         if m2:
-            history.add_datapoint("m2_latest", m2[-1])
+            datapoints["m2_latest"] = m2[-1]
     except Exception as e:
         print(f"Error fetching M2 data: {e}")
         m2 = []
+    m2_flat = is_m2_flat(m2)
 
     # Get Fear & Greed Index
     try:
-        fg = get_fear_greed()
-        history.add_datapoint("fear_greed", fg)
+        fg = market["fg"].result()
+        datapoints["fear_greed"] = fg
     except Exception as e:
         print(f"Error fetching Fear & Greed Index: {e}")
         fg = 0
 
-    # Check for social hype
-    hype = google_trends_hype()
-    cb = coinbase_app_top()
-
-    # Create charts for all indicators
-    charts = {}
-
-    # BTC Dominance chart
-    btc_history = history.get_history("btc_dominance")
-    if btc_history:
-        charts["Bitcoin Dominance (%)"] = create_chart(
-            btc_history, "Bitcoin Dominance Over Time", "BTC Dominance (%)"
-        )
-
-    # ETH Dominance chart
-    eth_history = history.get_history("eth_dominance")
-    if eth_history:
-        charts["Ethereum Dominance (%)"] = create_chart(
-            eth_history, "Ethereum Dominance Over Time", "ETH Dominance (%)"
-        )
+    # Record and persist all of this run's datapoints in a single write
+    history.update_many(datapoints)
+    history.flush()
 
-    # Alt Ratio chart
-    alt_history = history.get_history("alt_ratio")
-    if alt_history:
-        charts["Altcoin Ratio"] = create_chart(
-            alt_history, "Altcoin Ratio Over Time", "Ratio"
-        )
-
-    # M2 chart
-    m2_history = history.get_history("m2_latest")
-    if m2_history:
-        charts["M2 Money Supply"] = create_chart(
-            m2_history, "M2 Money Supply Over Time", "M2 Value"
+    # Update the altcoin ratio history; a broken history file must not drop
+    # the alerts that do not depend on it
+    try:
+        # Use the legacy check_alt_pullback function for compatibility with tests
+        alt_pull = check_alt_pullback(ratio)
+    except Exception as e:
+        print(f"Error checking altcoin pullback: {e}")
+        alt_pull = False
+
+    # Social hype only matters for the full exit signal, so skip both
+    # requests unless its cheaper preconditions already hold
+    hype = cb = False
+    if btc < C.BTC_DOM_THRESHOLD and m2_flat and fg >= 90:
+        social = fetch_concurrently(
+            {"hype": google_trends_hype, "cb": coinbase_app_top}
         )
+        hype = social["hype"].result()
+        cb = social["cb"].result()
 
-    # Fear & Greed chart
-    fg_history = history.get_history("fear_greed")
-    if fg_history:
-        charts["Fear & Greed Index"] = create_chart(
-            fg_history, "Fear & Greed Index Over Time", "Index Value"
-        )
+    # Check conditions and queue alerts as (subject, body) pairs
+    alerts: List[Tuple[str, str]] = []
 
-    # Check conditions and send alerts
     if btc < C.BTC_DOM_THRESHOLD:
-        send_email(
-            "⚠️ Trim Risky Alts",
-            f"BTC dom {btc:.2f}% < {C.BTC_DOM_THRESHOLD}% → Trim low-cap alts.",
-            charts,
+        alerts.append(
+            (
+                "⚠️ Trim Risky Alts",
+                f"BTC dom {btc:.2f}% < {C.BTC_DOM_THRESHOLD}% → Trim low-cap alts.",
+            )
         )
         trig.append("BTC dom")
 
-    if m2 and is_m2_flat(m2):
-        send_email(
-            "⚠️ Rotate Out of Midcaps",
-            "Global M2 peaking/flattening → rotate out of midcaps.",
-            charts,
+    if m2_flat:
+        alerts.append(
+            (
+                "⚠️ Rotate Out of Midcaps",
+                "Global M2 peaking/flattening → rotate out of midcaps.",
+            )
         )
         trig.append("M2 flat")
 
-    # Use the legacy check_alt_pullback function for compatibility with tests
-    if check_alt_pullback(ratio):
-        send_email(
-            "⚠️ Altcoin Pullback",
-            "Others market cap dropped >10% from 30-day high → scale out of ETH.",
-            charts,
+    if alt_pull:
+        alerts.append(
+            (
+                "⚠️ Altcoin Pullback",
+                "Others market cap dropped >10% from 30-day high → scale out of ETH.",
+            )
         )
         trig.append("Alt pull")
 
-    if btc < C.BTC_DOM_THRESHOLD and is_m2_flat(m2) and fg >= 90 and (hype or cb):
-        send_email(
-            "🚨 FULL EXIT SIGNAL",
-            "\n".join(
-                [
-                    "Multiple red flags:",
-                    f"- BTC dom {btc:.2f}% < {C.BTC_DOM_THRESHOLD}%",
-                    "- M2 peak/flat",
-                    f"- Fear&Greed {fg}",
-                    f"- Social/Coinbase hype: {hype or cb}",
-                    "EXIT ALL crypto positions now.",
-                ]
-            ),
-            charts,
+    if btc < C.BTC_DOM_THRESHOLD and m2_flat and fg >= 90 and (hype or cb):
+        alerts.append(
+            (
+                "🚨 FULL EXIT SIGNAL",
+                "\n".join(
+                    [
+                        "Multiple red flags:",
+                        f"- BTC dom {btc:.2f}% < {C.BTC_DOM_THRESHOLD}%",
+                        "- M2 peak/flat",
+                        f"- Fear&Greed {fg}",
+                        f"- Social/Coinbase hype: {hype or cb}",
+                        "EXIT ALL crypto positions now.",
+                    ]
+                ),
+            )
         )
         trig.append("Full exit")
 
+    # Charts are only needed as email attachments, so render them on demand and
+    # send every triggered alert over one SMTP session
+    if alerts:
+        charts = build_charts(history)
+        images = chart_images(charts)
+        send_emails(
+            [build_email(subject, body, charts, images) for subject, body in alerts]
+        )
+
     print(f"{datetime.now(timezone.utc)} | Triggers: {', '.join(trig) or 'None'}")
 
 
+def run_forever(interval: int, stop: Optional[threading.Event] = None) -> None:
+    """
+    Runs the monitor repeatedly in a single long-lived process.
+
+    Args:
+    interval: Seconds to wait between the start of one check and the next.
+    stop: Optional event that ends the loop when set. If omitted, one is created
+          and set on SIGINT or SIGTERM so the process shuts down cleanly.
+
+    Keeping the process alive lets the HTTP session, its pooled connections and
+    the in-memory response cache carry over between checks instead of being
+    rebuilt on every cron invocation. A failed check is logged and retried on
+    the next cycle.
+    """
+    if stop is None:
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda signum, frame: stop.set())
+
+    while not stop.is_set():
+        started = time.monotonic()
+        try:
+            main()
+        except Exception as e:
+            print(f"{datetime.now(timezone.utc)} | Error running monitor: {e}")
+        stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+
 if __name__ == "__main__":
-    main()
+    if C.INTERVAL_SECONDS > 0:
+        run_forever(C.INTERVAL_SECONDS)
+    else:
+        main()
@@ -6,6 +6,31 @@ from unittest.mock import MagicMock, patch
 from typing import Dict, List, Any
 
 
+@pytest.fixture(autouse=True)
+def isolated_http_cache(tmp_path, monkeypatch):
+    """
+    Isolate the fetcher TTL cache for every test.
+
+    This fixture starts each test with an empty in-memory cache persisted
+    to a temporary file, so cached responses never leak between tests.
+    """
+    import main
+
+    monkeypatch.setattr(main, "_http_cache", {})
+    monkeypatch.setattr(main.C, "HTTP_CACHE_FILE", str(tmp_path / "http_cache.json"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_working_dir(tmp_path, monkeypatch):
+    """
+    Run every test from a temporary working directory.
+
+    The monitor writes indicator_history.json relative to the current
+    directory, so this keeps test runs from touching the real history file.
+    """
+    monkeypatch.chdir(tmp_path)
+
+
 @pytest.fixture
 def mock_env(monkeypatch):
     """
@@ -66,7 +91,7 @@ def mock_responses():
             if empty:
                 return {"observations": []}
             return {
-                "observations": [{"value": "100"}, {"value": "101"}, {"value": "101.1"}]
+                "observations": [{"value": "101.1"}, {"value": "101"}, {"value": "100"}]
             }
 
         @staticmethod
@@ -91,12 +116,12 @@ def mock_responses():
 @pytest.fixture
 def mock_requests(mock_responses):
     """
-    Mock requests.get for all HTTP requests.
+    Mock SESSION.get for all HTTP requests.
 
-    This fixture intercepts all HTTP requests made with requests.get and
+    This fixture intercepts all HTTP requests made with SESSION.get and
     returns appropriate mock responses based on the URL.
     """
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
 
         def get_response(url, **kwargs):
             mock = MagicMock()
@@ -104,30 +129,33 @@ def mock_requests(mock_responses):
                 mock.json.return_value = mock_responses.coingecko_global()
             elif "fng" in url:
                 mock.json.return_value = mock_responses.fear_greed()
+                mock.content = json.dumps(mock_responses.fear_greed()).encode()
             elif "fred" in url:
                 mock.json.return_value = mock_responses.m2_series()
             elif "trends" in url:
                 mock.text = mock_responses.google_trends()
+                mock.content = mock_responses.google_trends().encode()
             elif "apps" in url:
                 mock.json.return_value = mock_responses.app_store()
+                mock.content = json.dumps(mock_responses.app_store()).encode()
             mock.raise_for_status = MagicMock()
             return mock
 
         mock_get.side_effect = get_response
-        return mock_get
+        yield mock_get
 
 
 @pytest.fixture
 def mock_requests_error():
     """
-    Mock requests.get to simulate API errors.
+    Mock SESSION.get to simulate API errors.
 
     This fixture makes all HTTP requests fail with an exception,
     allowing tests to verify error handling.
     """
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_get.side_effect = requests.exceptions.RequestException("API error")
-        return mock_get
+        yield mock_get
 
 
 @pytest.fixture
@@ -154,23 +182,59 @@ def mock_smtp_error():
         mock_context = MagicMock()
         mock_context.__enter__.side_effect = smtplib.SMTPException("SMTP error")
         mock_smtp.return_value = mock_context
-        return mock_smtp
+        yield mock_smtp
 
 
-@pytest.fixture
-def mock_history_file(tmp_path):
+@pytest.fixture(scope="session")
+def alt_pullback_history():
     """
-    Create a temporary history file for testing.
+    Altcoin ratio history shared by the whole test session.
 
-    This fixture creates a controlled history file with predefined data
-    in a temporary directory to avoid affecting real data.
+    Holds 30 days of history with a max ratio of 0.5. Tests must not
+    mutate it; copy it with list() first if a test needs to change it.
     """
-    history_file = tmp_path / "test_history.json"
-    # Create 30 days of history with max ratio 0.5
-    history = [
+    return [
         {"date": f"2025-04-{day:02d}", "ratio": 0.4 + 0.1 * (day / 30)}
         for day in range(1, 31)
     ]
+
+
+@pytest.fixture(scope="session")
+def canonical_history_bytes(alt_pullback_history):
+    """
+    Serialized altcoin ratio history shared by the whole test session.
+
+    Encodes alt_pullback_history once so tests only pay for writing it.
+    """
+    return json.dumps(alt_pullback_history).encode()
+
+
+@pytest.fixture
+def history_file(tmp_path, canonical_history_bytes):
+    """
+    Write the canonical altcoin ratio history to a fresh temporary file.
+
+    Each test gets its own copy, so tests that update the history never
+    affect each other.
+    """
+    path = tmp_path / "test_history.json"
+    path.write_bytes(canonical_history_bytes)
+    return path
+
+
+@pytest.fixture(scope="module")
+def mock_history_file(tmp_path_factory, alt_pullback_history):
+    """
+    Create a temporary history file for testing.
+
+    This fixture creates a controlled history file with predefined data
+    in a temporary directory to avoid affecting real data. The file is
+    created once per test module and shared by its tests, which stub out
+    the pullback check and so never depend on its exact contents.
+    """
+    history_file = tmp_path_factory.mktemp("history") / "test_history.json"
+    # 30 days of history with max ratio 0.5
+    history = list(alt_pullback_history)
     with open(history_file, "w") as f:
         json.dump(history, f)
 
@@ -1,6 +1,6 @@
 import os
 import pytest
-from main import C, efloat, eint, estr, elist
+from main import C, efloat, eint, estr, elist, load_config
 
 
 class TestConfigHelpers:
@@ -72,35 +72,42 @@ class TestConfigHelpers:
 
 
 class TestConfigClass:
-    """Tests for the C configuration class."""
+    """Tests for the C configuration object."""
 
     def test_config_loading(self, mock_env, monkeypatch):
         """Test configuration loading from environment."""
-        # We need to reload the module to pick up the mocked environment variables
-        import importlib
-        import main as main_module
+        # Parse the mocked environment directly instead of reloading the module
+        config = load_config()
 
-        importlib.reload(main_module)
-
-        # Now test the reloaded C class
-        assert main_module.C.EMAIL_ADDRESS == "test@example.com"
-        assert main_module.C.EMAIL_PASSWORD == "test_password"
-        assert main_module.C.FRED_API_KEY == "test_fred_key"
+        assert config.EMAIL_ADDRESS == "test@example.com"
+        assert config.EMAIL_PASSWORD == "test_password"
+        assert config.FRED_API_KEY == "test_fred_key"
 
         # Test float values
-        assert main_module.C.BTC_DOM_THRESHOLD == 45.0
-        assert main_module.C.M2_FLAT_THRESHOLD == 0.001
-        assert main_module.C.ALT_PULLBACK == 0.90
-        assert isinstance(main_module.C.BTC_DOM_THRESHOLD, float)
+        assert config.BTC_DOM_THRESHOLD == 45.0
+        assert config.M2_FLAT_THRESHOLD == 0.001
+        assert config.ALT_PULLBACK == 0.90
+        assert isinstance(config.BTC_DOM_THRESHOLD, float)
 
         # Test int values
-        assert main_module.C.TRENDS_HITS_REQ == 2
-        assert isinstance(main_module.C.TRENDS_HITS_REQ, int)
+        assert config.TRENDS_HITS_REQ == 2
+        assert isinstance(config.TRENDS_HITS_REQ, int)
 
         # Test list values
-        assert main_module.C.SOCIAL_TERMS == ["bitcoin", "crypto", "eth"]
-        assert isinstance(main_module.C.SOCIAL_TERMS, list)
-        assert all(isinstance(term, str) for term in main_module.C.SOCIAL_TERMS)
+        assert config.SOCIAL_TERMS == ["bitcoin", "crypto", "eth"]
+        assert isinstance(config.SOCIAL_TERMS, list)
+        assert all(isinstance(term, str) for term in config.SOCIAL_TERMS)
+
+    def test_load_config_reads_current_environment(self, mock_env, monkeypatch):
+        """Test that load_config parses the environment at call time."""
+        monkeypatch.setenv("BTC_DOM_THRESHOLD", "50.5")
+        monkeypatch.setenv("TRENDS_HITS_REQ", "not-a-number")
+
+        config = load_config()
+
+        assert config.BTC_DOM_THRESHOLD == 50.5
+        assert config.TRENDS_HITS_REQ == 2  # Invalid value falls back to default
+        assert config.HISTORY_FILE == "test_history.json"
 
     def test_config_defaults(self, monkeypatch):
         """Test configuration defaults when environment variables are not set."""
@@ -117,15 +124,11 @@ class TestConfigClass:
         ]:
             monkeypatch.delenv(key, raising=False)
 
-        # Reload the module to pick up the default values
-        import importlib
-        import main as main_module
-
-        importlib.reload(main_module)
+        config = load_config()
 
         # Test default values
-        assert main_module.C.BTC_DOM_THRESHOLD == 45.0
-        assert main_module.C.M2_FLAT_THRESHOLD == 0.001
-        assert main_module.C.ALT_PULLBACK == 0.90
-        assert main_module.C.TRENDS_HITS_REQ == 2
-        assert isinstance(main_module.C.SOCIAL_TERMS, list)
+        assert config.BTC_DOM_THRESHOLD == 45.0
+        assert config.M2_FLAT_THRESHOLD == 0.001
+        assert config.ALT_PULLBACK == 0.90
+        assert config.TRENDS_HITS_REQ == 2
+        assert isinstance(config.SOCIAL_TERMS, list)
@@ -1,5 +1,7 @@
+import json
 import pytest
 import requests
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 from main import (
@@ -12,23 +14,40 @@ from main import (
     load_history,
     save_history,
     check_alt_pullback,
+    ttl_cache,
+    fetch_concurrently,
+    IndicatorHistory,
 )
 
+# Canned API payloads shared by the fetcher tests
+FG_URL = "https://api.alternative.me/fng/?limit=1"
+CG_GLOBAL_JSON = {
+    "data": {
+        "market_cap_percentage": {"btc": 40.0, "eth": 20.0},
+        "total_market_cap": {"usd": 2000000000000},
+    }
+}
+FG_CONTENT = (
+    b'{"name":"Fear and Greed Index","data":[{"value": "95",'
+    b'"value_classification":"Extreme Greed"}]}'
+)
+TRENDS_PAYLOAD = b')]}\'{"default":{"trendingSearchesDays":[{"trendingSearches":[{"title":{"query":"bitcoin moon"}}]}]}}'
+
+
+def fake_response(json_data=None, content=b""):
+    """Build a minimal stand-in for a successful requests.Response."""
+    return SimpleNamespace(
+        json=lambda: json_data, content=content, raise_for_status=lambda: None
+    )
+
 
 class TestDataFetchers:
     """Tests for data fetching functions."""
 
     def test_coingecko_fetcher(self):
         """Test CoinGecko API fetcher with successful response."""
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.json.return_value = {
-                "data": {
-                    "market_cap_percentage": {"btc": 40.0, "eth": 20.0},
-                    "total_market_cap": {"usd": 2000000000000},
-                }
-            }
-            mock_get.return_value = mock_response
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(json_data=CG_GLOBAL_JSON)
 
             btc, eth, total = get_coingecko_global()
             assert btc == 40.0
@@ -38,55 +57,59 @@ class TestDataFetchers:
             assert isinstance(eth, float)
             assert isinstance(total, float)
 
-    def test_coingecko_fetcher_error(self):
+    def test_coingecko_fetcher_error(self, mock_requests_error):
         """Test CoinGecko API fetcher with error response."""
-        with patch("requests.get") as mock_get:
-            mock_get.side_effect = requests.exceptions.RequestException("API error")
-            with pytest.raises(requests.exceptions.RequestException):
-                get_coingecko_global()
+        with pytest.raises(requests.exceptions.RequestException):
+            get_coingecko_global()
 
     def test_fear_greed_fetcher(self):
         """Test Fear & Greed index fetcher with successful response."""
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.json.return_value = {"data": [{"value": "95"}]}
-            mock_get.return_value = mock_response
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(content=FG_CONTENT)
 
-            fg = get_fear_greed()
+            fg = get_fear_greed(FG_URL)
             assert fg == 95
             assert isinstance(fg, int)
 
-    def test_fear_greed_fetcher_error(self):
+    def test_fear_greed_fetcher_missing_value(self):
+        """Test Fear & Greed index fetcher with a response lacking a value."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(content=b'{"data":[]}')
+
+            with pytest.raises(ValueError):
+                get_fear_greed(FG_URL)
+
+    def test_fear_greed_fetcher_error(self, mock_requests_error):
         """Test Fear & Greed index fetcher with error response."""
-        with patch("requests.get") as mock_get:
-            mock_get.side_effect = requests.exceptions.RequestException("API error")
-            with pytest.raises(requests.exceptions.RequestException):
-                get_fear_greed()
+        with pytest.raises(requests.exceptions.RequestException):
+            get_fear_greed(FG_URL)
 
     def test_m2_series_fetcher(self):
         """Test M2 money supply fetcher with successful response."""
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.json.return_value = {
-                "observations": [
-                    {"value": "100"},
-                    {"value": "101"},
-                    {"value": "101.1"},
-                ]
-            }
-            mock_get.return_value = mock_response
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(
+                json_data={
+                    "observations": [
+                        {"value": "101.1"},
+                        {"value": "101"},
+                        {"value": "."},
+                        {"value": "100"},
+                    ]
+                }
+            )
 
             m2 = get_m2_series()
-            assert m2 == [100.0, 101.0, 101.1]
+            assert m2 == [100.0, 101.0, 101.1]  # Oldest first, missing values dropped
+            params = mock_get.call_args.kwargs["params"]
+            assert params["sort_order"] == "desc"
+            assert params["limit"] == 12
             assert isinstance(m2, list)
             assert all(isinstance(x, float) for x in m2)
 
-    def test_m2_series_fetcher_error(self):
+    def test_m2_series_fetcher_error(self, mock_requests_error):
         """Test M2 money supply fetcher with error response."""
-        with patch("requests.get") as mock_get:
-            mock_get.side_effect = requests.exceptions.RequestException("API error")
-            with pytest.raises(requests.exceptions.RequestException):
-                get_m2_series()
+        with pytest.raises(requests.exceptions.RequestException):
+            get_m2_series()
 
     @pytest.mark.parametrize(
         "m2_values,expected",
@@ -108,33 +131,37 @@ class TestDataFetchers:
             (["nonexistent"], 1, False),  # Should not detect
             (["bitcoin", "crypto"], 1, True),  # Should detect with multiple terms
             (["bitcoin"], 2, False),  # Should not detect with higher threshold
+            (["BitCoin"], 1, True),  # Should match case-insensitively
+            (["nonexistent"], 0, True),  # Zero threshold is always met
+            (["bit.oin"], 1, False),  # Terms are matched literally, not as regex
+            ([], 1, False),  # No terms never match
         ],
     )
     def test_google_trends_hype(self, social_terms, hits_required, expected):
         """Test Google Trends hype detection with various configurations."""
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.text = ')]}\'{"default":{"trendingSearchesDays":[{"trendingSearches":[{"title":{"query":"bitcoin moon"}}]}]}}'
-            mock_response.raise_for_status = MagicMock()
-            mock_get.return_value = mock_response
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(content=TRENDS_PAYLOAD)
 
             with patch("main.C.SOCIAL_TERMS", social_terms):
                 with patch("main.C.TRENDS_HITS_REQ", hits_required):
                     assert google_trends_hype() == expected
 
-    def test_google_trends_hype_error(self):
+    def test_google_trends_hype_error(self, mock_requests_error):
         """Test Google Trends hype detection with error response."""
-        with patch("requests.get") as mock_get:
-            mock_get.side_effect = requests.exceptions.RequestException("API error")
-            assert google_trends_hype() == False  # Should return False on error
+        assert google_trends_hype() == False  # Should return False on error
+
+    def test_google_trends_hype_null_query(self):
+        """Test Google Trends hype detection with a trend lacking a query."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(
+                content=b')]}\'{"default":{"trendingSearchesDays":[{"trendingSearches":[{"title":{"query":null}}]}]}}'
+            )
+            assert google_trends_hype() == False
 
     def test_google_trends_hype_empty(self):
         """Test Google Trends hype detection with empty response."""
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.text = ")]}'"
-            mock_response.raise_for_status = MagicMock()
-            mock_get.return_value = mock_response
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(content=b")]}'")
             assert google_trends_hype() == False
 
     @pytest.mark.parametrize(
@@ -146,31 +173,245 @@ class TestDataFetchers:
     )
     def test_coinbase_trending(self, app_name, expected):
         """Test Coinbase app store trending detection with various app names."""
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.json.return_value = {
-                "feed": {"results": [{"name": app_name}]}
-            }
-            mock_response.raise_for_status = MagicMock()
-            mock_get.return_value = mock_response
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(
+                content=json.dumps({"feed": {"results": [{"name": app_name}]}}).encode()
+            )
             assert coinbase_app_top() == expected
 
-    def test_coinbase_trending_error(self):
+    def test_coinbase_trending_error(self, mock_requests_error):
         """Test Coinbase app store trending detection with error response."""
-        with patch("requests.get") as mock_get:
-            mock_get.side_effect = requests.exceptions.RequestException("API error")
-            assert coinbase_app_top() == False  # Should return False on error
+        assert coinbase_app_top() == False  # Should return False on error
+
+    def test_coinbase_trending_malformed(self):
+        """Test Coinbase app store trending detection with an unexpected payload."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(
+                content=b'{"feed": {"title": "Coinbase"}}'
+            )
+            assert coinbase_app_top() == False
 
     def test_coinbase_trending_empty(self):
         """Test Coinbase app store trending detection with empty response."""
-        with patch("requests.get") as mock_get:
-            mock_response = MagicMock()
-            mock_response.json.return_value = {"feed": {"results": []}}
-            mock_response.raise_for_status = MagicMock()
-            mock_get.return_value = mock_response
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(content=b'{"feed": {"results": []}}')
             assert coinbase_app_top() == False
 
 
+class TestHttpCache:
+    """Tests for the fetcher TTL cache."""
+
+    def test_ttl_cache_reuses_fresh_value(self):
+        """Test that a fresh cached value skips the wrapped call."""
+        fetch = MagicMock(return_value=42, __name__="fetch")
+        cached = ttl_cache(60)(fetch)
+
+        assert cached() == 42
+        assert cached() == 42
+        assert fetch.call_count == 1
+
+    def test_ttl_cache_refetches_expired_value(self):
+        """Test that an expired cached value triggers a new call."""
+        fetch = MagicMock(side_effect=[1, 2], __name__="fetch")
+        cached = ttl_cache(60)(fetch)
+
+        with patch("main.time.time", return_value=1000.0):
+            assert cached() == 1
+        with patch("main.time.time", return_value=1061.0):
+            assert cached() == 2
+        assert fetch.call_count == 2
+
+    def test_ttl_cache_persists_to_disk(self):
+        """Test that cached values are reloaded from the cache file."""
+        fetch = MagicMock(return_value=[1.0, 2.0], __name__="fetch")
+        ttl_cache(60)(fetch)()
+
+        with patch("main._http_cache", None):
+            assert ttl_cache(60)(fetch)() == [1.0, 2.0]
+        assert fetch.call_count == 1
+
+    def test_ttl_cache_restores_tuples_from_disk(self):
+        """Test that tuple results are still tuples when reloaded from disk."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(json_data=CG_GLOBAL_JSON)
+            fresh = get_coingecko_global()
+
+            with patch("main._http_cache", None):
+                cached = get_coingecko_global()
+
+        assert cached == fresh
+        assert isinstance(cached, tuple)
+        assert mock_get.call_count == 1
+
+    def test_failed_trends_request_is_not_cached(self):
+        """Test that a failed request is retried instead of cached as False."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.side_effect = [
+                requests.exceptions.ConnectionError("API error"),
+                fake_response(content=TRENDS_PAYLOAD),
+            ]
+            with patch("main.C.SOCIAL_TERMS", ["bitcoin"]):
+                with patch("main.C.TRENDS_HITS_REQ", 1):
+                    assert google_trends_hype() == False
+                    assert google_trends_hype() == True
+        assert mock_get.call_count == 2
+
+    def test_cached_trends_follow_current_config(self):
+        """Test that config changes apply to cached trends without refetching."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.return_value = fake_response(content=TRENDS_PAYLOAD)
+            with patch("main.C.TRENDS_HITS_REQ", 1):
+                with patch("main.C.SOCIAL_TERMS", ["bitcoin"]):
+                    assert google_trends_hype() == True
+                with patch("main.C.SOCIAL_TERMS", ["nonexistent"]):
+                    assert google_trends_hype() == False
+        assert mock_get.call_count == 1
+
+    def test_app_store_cache_is_keyed_by_feed_url(self):
+        """Test that changing APP_STORE_RSS fetches the new feed."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.side_effect = [
+                fake_response(content=b'{"feed": {"results": [{"name": "Other"}]}}'),
+                fake_response(content=b'{"feed": {"results": [{"name": "Coinbase"}]}}'),
+            ]
+            with patch("main.C.APP_STORE_RSS", "https://a.example.com/apps.json"):
+                assert coinbase_app_top() == False
+            with patch("main.C.APP_STORE_RSS", "https://b.example.com/apps.json"):
+                assert coinbase_app_top() == True
+        assert mock_get.call_count == 2
+
+    def test_fear_greed_cache_is_keyed_by_api_url(self):
+        """Test that changing FEAR_GREED_API fetches the new endpoint."""
+        with patch("requests.Session.get") as mock_get:
+            mock_get.side_effect = [
+                fake_response(content=b'{"data":[{"value": "20"}]}'),
+                fake_response(content=b'{"data":[{"value": "95"}]}'),
+            ]
+            assert get_fear_greed("https://a.example.com/fng/") == 20
+            assert get_fear_greed("https://b.example.com/fng/") == 95
+            assert get_fear_greed("https://a.example.com/fng/") == 20
+        assert mock_get.call_count == 2
+
+
+class TestFetchConcurrently:
+    """Tests for the concurrent fetch helper."""
+
+    def test_fetch_concurrently_collects_results_and_errors(self):
+        """Test that values and exceptions are returned per fetcher."""
+
+        def failing():
+            raise requests.exceptions.RequestException("API error")
+
+        results = fetch_concurrently({"ok": lambda: 42, "bad": failing})
+
+        assert results["ok"].result() == 42
+        with pytest.raises(requests.exceptions.RequestException):
+            results["bad"].result()
+
+
+class TestIndicatorHistory:
+    """Tests for the indicator history store."""
+
+    def test_add_datapoint_buffers_until_flush(self, tmp_path):
+        """Test that datapoints are written once, on flush."""
+        history_file = tmp_path / "indicator_history.json"
+        history = IndicatorHistory(str(history_file))
+
+        history.add_datapoint("btc_dominance", 50.0)
+        history.add_datapoint("eth_dominance", 20.0)
+        assert not history_file.exists()
+
+        history.flush()
+        saved = json.loads(history_file.read_text())
+        assert list(saved["btc_dominance"].values()) == [50.0]
+        assert list(saved["eth_dominance"].values()) == [20.0]
+
+    def test_update_many_records_all_indicators(self, tmp_path):
+        """Test that a bulk update records today's value for every indicator."""
+        history_file = tmp_path / "indicator_history.json"
+        history = IndicatorHistory(str(history_file))
+
+        history.update_many({"btc_dominance": 50.0, "fear_greed": 72})
+        history.flush()
+
+        saved = json.loads(history_file.read_text())
+        assert list(saved["btc_dominance"].values()) == [50.0]
+        assert list(saved["fear_greed"].values()) == [72]
+
+    def test_add_datapoint_replaces_same_day(self, tmp_path):
+        """Test that a second datapoint on the same day replaces the first."""
+        history = IndicatorHistory(str(tmp_path / "indicator_history.json"))
+
+        history.add_datapoint("fear_greed", 40)
+        history.add_datapoint("fear_greed", 55)
+
+        assert [e["value"] for e in history.get_history("fear_greed")] == [55]
+
+    def test_add_datapoint_keeps_last_90_days(self, tmp_path):
+        """Test that only the most recent 90 dates are kept."""
+        history_file = tmp_path / "indicator_history.json"
+        history_file.write_text(
+            json.dumps(
+                {"alt_ratio": {f"2025-01-{i:03d}": 0.1 * i for i in range(1, 91)}}
+            )
+        )
+        history = IndicatorHistory(str(history_file))
+
+        history.add_datapoint("alt_ratio", 0.5)
+
+        series = history.data["alt_ratio"]
+        assert len(series) == 90
+        assert "2025-01-001" not in series
+
+    def test_load_legacy_list_history(self, tmp_path):
+        """Test that list-shaped history from earlier versions is converted."""
+        history_file = tmp_path / "indicator_history.json"
+        history_file.write_text(
+            json.dumps(
+                {
+                    "btc_dominance": [
+                        {"date": "2025-05-02", "value": 51.0},
+                        {"date": "2025-05-01", "value": 50.0},
+                    ]
+                }
+            )
+        )
+        history = IndicatorHistory(str(history_file))
+
+        assert history.data == {
+            "btc_dominance": {"2025-05-02": 51.0, "2025-05-01": 50.0}
+        }
+        assert history.get_history("btc_dominance") == [
+            {"date": "2025-05-01", "value": 50.0},
+            {"date": "2025-05-02", "value": 51.0},
+        ]
+
+    def test_history_kept_in_date_order(self, tmp_path):
+        """Test that history is returned oldest first however it was stored."""
+        history_file = tmp_path / "indicator_history.json"
+        history_file.write_text(
+            json.dumps({"fear_greed": {"2999-01-02": 70, "2025-05-01": 40}})
+        )
+        history = IndicatorHistory(str(history_file))
+
+        history.add_datapoint("fear_greed", 55)
+
+        dates = [e["date"] for e in history.get_history("fear_greed")]
+        assert dates == sorted(dates)
+        assert dates[0] == "2025-05-01"
+        assert dates[-1] == "2999-01-02"
+
+    def test_flush_skips_write_when_clean(self, tmp_path):
+        """Test that flushing without changes does not rewrite the file."""
+        history_file = tmp_path / "indicator_history.json"
+        history_file.write_text('{"btc_dominance": {}}')
+        history = IndicatorHistory(str(history_file))
+
+        with patch("main.json.dump") as mock_dump:
+            history.flush()
+            mock_dump.assert_not_called()
+
+
 class TestHistoryFunctions:
     """Tests for history file handling functions."""
 
@@ -180,8 +421,6 @@ class TestHistoryFunctions:
         history_file = tmp_path / "test_history.json"
         test_data = [{"date": "2025-01-01", "ratio": 0.5}]
         with open(history_file, "w") as f:
-            import json
-
             json.dump(test_data, f)
 
         # Test loading
@@ -189,6 +428,22 @@ class TestHistoryFunctions:
             history = load_history()
             assert history == test_data
 
+    def test_load_history_jsonl_file(self, tmp_path):
+        """Test loading the last 90 entries from a JSON Lines history file."""
+        history_file = tmp_path / "test_history.json"
+        history_file.write_text(
+            "".join(
+                f'{{"date": "2025-01-{i}", "ratio": {0.1 * i}}}\n'
+                for i in range(1, 100)
+            )
+        )
+
+        with patch("main.C.HISTORY_FILE", str(history_file)):
+            history = load_history()
+            assert len(history) == 90
+            assert history[0]["date"] == "2025-01-10"
+            assert history[-1]["date"] == "2025-01-99"
+
     def test_load_history_nonexistent_file(self):
         """Test loading history from a nonexistent file."""
         with patch("main.C.HISTORY_FILE", "nonexistent_file.json"):
@@ -198,7 +453,7 @@ class TestHistoryFunctions:
     def test_save_history(self, tmp_path):
         """Test saving history to a file."""
         history_file = tmp_path / "test_history.json"
-        test_data = [{"date": f"2025-01-{i}", "ratio": 0.1 * i} for i in range(1, 100)]
+        test_data = [{"date": f"2025-01-{i}", "ratio": 0.1 * i} for i in range(1, 92)]
 
         with patch("main.C.HISTORY_FILE", str(history_file)):
             save_history(test_data)
@@ -208,13 +463,9 @@ class TestHistoryFunctions:
 
             # Verify content
             with open(history_file) as f:
-                import json
-
-                saved_data = json.load(f)
+                saved_data = [json.loads(line) for line in f]
                 assert len(saved_data) == 90  # Should keep only last 90 entries
+                assert saved_data[0]["date"] == "2025-01-2"  # First entry should be 2nd
                 assert (
-                    saved_data[0]["date"] == "2025-01-10"
-                )  # First entry should be 10th
-                assert (
-                    saved_data[-1]["date"] == "2025-01-99"
-                )  # Last entry should be 99th
+                    saved_data[-1]["date"] == "2025-01-91"
+                )  # Last entry should be 91st
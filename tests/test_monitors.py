@@ -5,24 +5,23 @@ import smtplib
 import requests
 from unittest.mock import patch, call, MagicMock
 from datetime import datetime, timezone
-from main import check_alt_pullback, send_email, main, load_history, save_history
+import main as main_module
+from main import (
+    check_alt_pullback,
+    create_chart,
+    send_email,
+    main,
+    load_history,
+    save_history,
+)
 
 
 class TestAltcoinPullback:
     """Tests for altcoin pullback detection."""
 
-    def test_alt_pullback_detection(self, tmp_path):
+    def test_alt_pullback_detection(self, history_file):
         """Test altcoin pullback detection with various ratios and thresholds."""
-        # Create a history file with a known maximum ratio
-        history_file = tmp_path / "test_history.json"
-        # Create 30 days of history with max ratio 0.5
-        history = [
-            {"date": f"2025-04-{day:02d}", "ratio": 0.4 + 0.1 * (day / 30)}
-            for day in range(1, 31)
-        ]
-        with open(history_file, "w") as f:
-            json.dump(history, f)
-
+        # The history file holds 30 days with a known maximum ratio of 0.5
         with patch("main.C.HISTORY_FILE", str(history_file)):
             with patch("main.C.ALT_PULLBACK", 0.9):
                 # Test with ratio that should trigger pullback
@@ -49,13 +48,8 @@ class TestAltcoinPullback:
             # Should return False due to insufficient history
             assert check_alt_pullback(0.4) is False
 
-    def test_alt_pullback_updates_history(self, tmp_path):
+    def test_alt_pullback_updates_history(self, history_file):
         """Test that check_alt_pullback updates the history file with the current ratio."""
-        history_file = tmp_path / "update_history.json"
-        history = [{"date": f"2025-04-{day:02d}", "ratio": 0.5} for day in range(1, 31)]
-        with open(history_file, "w") as f:
-            json.dump(history, f)
-
         # Create a fixed date for testing
         fixed_date = "2025-05-01"
 
@@ -76,23 +70,141 @@ class TestAltcoinPullback:
                     for entry in updated_history
                 )
 
+    def test_alt_pullback_appends_new_day(self, tmp_path):
+        """Test that a new day's ratio is appended as a single JSON line."""
+        history_file = tmp_path / "append_history.json"
+        lines = [
+            json.dumps({"date": f"2025-04-{day:02d}", "ratio": 0.5}) + "\n"
+            for day in range(1, 11)
+        ]
+        history_file.write_text("".join(lines))
+
+        with patch("main.C.HISTORY_FILE", str(history_file)):
+            check_alt_pullback(0.6)
+
+        written = history_file.read_text().splitlines(keepends=True)
+        assert written[:10] == lines  # Existing lines are left untouched
+        assert len(written) == 11
+        assert json.loads(written[-1])["ratio"] == 0.6
+
+    def test_alt_pullback_overwrites_same_day(self, tmp_path):
+        """Test that a repeat run on the same day replaces only the last line."""
+        history_file = tmp_path / "same_day_history.json"
+
+        with patch("main.C.HISTORY_FILE", str(history_file)):
+            check_alt_pullback(0.5)
+            check_alt_pullback(0.4)
+            check_alt_pullback(0.45)
+            history = load_history()
+
+        assert len(history) == 1
+        assert history[0]["ratio"] == 0.45
+        assert len(history_file.read_text().splitlines()) == 1
+
+    def test_alt_pullback_overwrite_with_shorter_line(self, tmp_path):
+        """Test that a shorter same-day line leaves no bytes of the old one."""
+        history_file = tmp_path / "shorter_history.json"
+
+        with patch("main.C.HISTORY_FILE", str(history_file)):
+            check_alt_pullback(0.123456789)
+            check_alt_pullback(0.5)
+            history = load_history()
+
+        assert history[0]["ratio"] == 0.5
+        assert len(history_file.read_text().splitlines()) == 1
+
+    def test_alt_pullback_recovers_from_partial_last_line(self, tmp_path):
+        """Test that a half-written last line is dropped and the file repaired."""
+        history_file = tmp_path / "partial_history.json"
+        lines = [
+            json.dumps({"date": f"2025-04-{day:02d}", "ratio": 0.5}) + "\n"
+            for day in range(1, 11)
+        ]
+        history_file.write_text("".join(lines) + '{"date":"2025-04-11","ra')
+
+        with patch("main.C.HISTORY_FILE", str(history_file)):
+            assert check_alt_pullback(0.4) is True
+            history = load_history()
+
+        assert len(history) == 11
+        assert history[-1]["ratio"] == 0.4
+        written = history_file.read_text().splitlines()
+        assert all(json.loads(line) for line in written)
+
+
+class TestCreateChart:
+    """Tests for chart rendering."""
+
+    def test_import_does_not_load_plotting_libraries(self):
+        """Test that matplotlib and seaborn are only imported when charting."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, main; "
+            "print(any(m in sys.modules for m in ('matplotlib', 'seaborn')))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            check=True,
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_create_chart_reuses_figure(self):
+        """Test that consecutive charts are drawn on the same cached figure."""
+        history = [
+            {"date": "2025-05-01", "value": 50.0},
+            {"date": "2025-05-02", "value": 51.5},
+        ]
+
+        first = create_chart(history, "BTC Dominance", "Dominance (%)")
+        fig = main_module._FIG
+        second = create_chart([], "Fear & Greed", "Index")
+
+        assert main_module._FIG is fig
+        assert first.getvalue().startswith(b"\x89PNG")
+        assert second.getvalue().startswith(b"\x89PNG")
+        assert main_module._AX.get_title() == "Fear & Greed"
+
+    def test_create_chart_uses_agg_backend(self):
+        """Test that Agg is selected before anything imports pyplot."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys, matplotlib, main\n"
+            "seen = []\n"
+            "use = matplotlib.use\n"
+            "def record(*args, **kwargs):\n"
+            "    seen.append('matplotlib.pyplot' in sys.modules)\n"
+            "    return use(*args, **kwargs)\n"
+            "matplotlib.use = record\n"
+            "main.create_chart([], 'Altcoin Ratio', 'Ratio')\n"
+            "print(seen, matplotlib.get_backend().lower())\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env={**os.environ, "MPLBACKEND": "svg"},
+            check=True,
+        )
+        assert result.stdout.strip() == "[False] agg"
+
 
 class TestEmailAlerts:
     """Tests for email alert functionality."""
 
     def test_email_sending_success(self, mock_smtp, monkeypatch):
         """Test successful email alert sending."""
-        # Patch the email address to match the expected value
-        monkeypatch.setenv("EMAIL_ADDRESS", "test@example.com")
-        monkeypatch.setenv("EMAIL_PASSWORD", "test_password")
-
-        # Reload the module to pick up the mocked environment variables
-        import importlib
-        import main as main_module
+        # Patch the email credentials to match the expected values
+        monkeypatch.setattr(main_module.C, "EMAIL_ADDRESS", "test@example.com")
+        monkeypatch.setattr(main_module.C, "EMAIL_PASSWORD", "test_password")
 
-        importlib.reload(main_module)
-
-        # Use the send_email function from the reloaded module
         main_module.send_email("Test Subject", "Test Body")
         mock_smtp.assert_called_once()
         mock_smtp.return_value.__enter__.return_value.send_message.assert_called_once()
@@ -107,20 +219,60 @@ class TestEmailAlerts:
 
     def test_email_sending_failure(self, mock_smtp_error, monkeypatch):
         """Test email alert sending with SMTP error."""
-        # Patch the email address to match the expected value
-        monkeypatch.setenv("EMAIL_ADDRESS", "test@example.com")
-        monkeypatch.setenv("EMAIL_PASSWORD", "test_password")
-
-        # Reload the module to pick up the mocked environment variables
-        import importlib
-        import main as main_module
-
-        importlib.reload(main_module)
+        # Patch the email credentials to match the expected values
+        monkeypatch.setattr(main_module.C, "EMAIL_ADDRESS", "test@example.com")
+        monkeypatch.setattr(main_module.C, "EMAIL_PASSWORD", "test_password")
 
         # The function should handle the error gracefully
         with pytest.raises(smtplib.SMTPException):
             main_module.send_email("Test Subject", "Test Body")
 
+    def test_send_emails_single_session(self, mock_smtp, monkeypatch):
+        """Test that several emails are sent over one SMTP session."""
+        messages = [
+            main_module.build_email("First", "Body 1"),
+            main_module.build_email("Second", "Body 2"),
+        ]
+        main_module.send_emails(messages)
+
+        mock_smtp.assert_called_once()
+        session = mock_smtp.return_value.__enter__.return_value
+        session.starttls.assert_called_once()
+        session.login.assert_called_once()
+        assert [c.args[0]["Subject"] for c in session.send_message.call_args_list] == [
+            "First",
+            "Second",
+        ]
+
+    def test_build_email_embeds_charts(self):
+        """Test that charts are attached as inline PNG images."""
+        from io import BytesIO
+
+        png = b"\x89PNG\r\n\x1a\nchart"
+        msg = main_module.build_email(
+            "⚠️ Trim Risky Alts", "Body", {"Fear & Greed Index": BytesIO(png)}
+        )
+
+        images = [p for p in msg.walk() if p.get_content_type() == "image/png"]
+        assert len(images) == 1
+        assert images[0]["Content-ID"] == "<fear_&_greed_index>"
+        assert images[0].get_payload(decode=True) == png
+
+    def test_build_email_reuses_encoded_charts(self):
+        """Test that prebuilt chart images are attached instead of re-encoded."""
+        from io import BytesIO
+
+        charts = {"Altcoin Ratio": BytesIO(b"\x89PNG\r\n\x1a\nchart")}
+        images = main_module.chart_images(charts)
+
+        with patch("main.MIMEImage") as mock_image:
+            first = main_module.build_email("⚠️ First", "Body", charts, images)
+            second = main_module.build_email("⚠️ Second", "Body", charts, images)
+
+        mock_image.assert_not_called()
+        for msg in (first, second):
+            assert msg.get_payload()[-1] is images["Altcoin Ratio"]
+
 
 class TestMainMonitoring:
     """Tests for the main monitoring function."""
@@ -129,84 +281,137 @@ class TestMainMonitoring:
         self, mock_requests, mock_smtp, mock_history_file, monkeypatch
     ):
         """Test full monitoring cycle with all triggers active."""
-        # Patch the email address to match the expected value
-        monkeypatch.setenv("EMAIL_ADDRESS", "test@example.com")
-        monkeypatch.setenv("EMAIL_PASSWORD", "test_password")
-
-        # Reload the module to pick up the mocked environment variables
-        import importlib
-        import main as main_module
-
-        importlib.reload(main_module)
-
-        # Set up mocks for the reloaded module
-        with patch("main.C.HISTORY_FILE", mock_history_file["path"]):
-            with patch(
-                "main.get_coingecko_global",
-                return_value=(44.0, 20.0, 2000000000000),
-            ):
-                with patch("main.get_fear_greed", return_value=95):
-                    with patch(
-                        "main.get_m2_series",
-                        return_value=[100.0, 100.001, 100.002],
-                    ):
-                        with patch("main.google_trends_hype", return_value=True):
-                            with patch("main.coinbase_app_top", return_value=True):
-                                with patch(
-                                    "main.check_alt_pullback", return_value=True
-                                ):
-                                    # Run the main function
-                                    main_module.main()
-
-                                    # Should have 4 email calls (3 individual alerts + full exit)
-                                    # Reset the mock to check only the call count for send_message
-                                    mock_smtp.reset_mock()
-
-                                    # Run the main function again
-                                    main_module.main()
-
-                                    # Now check the call count
-                                    assert (
-                                        mock_smtp.return_value.__enter__.return_value.send_message.call_count
-                                        == 4
-                                    )
-
-                                    # Verify the full exit email was sent
-                                    calls = (
-                                        mock_smtp.return_value.__enter__.return_value.send_message.call_args_list
-                                    )
-                                    subjects = [
-                                        call.args[0]["Subject"] for call in calls
-                                    ]
-                                    assert "🚨 FULL EXIT SIGNAL" in subjects
+        # Patch the email credentials to match the expected values
+        monkeypatch.setattr(main_module.C, "EMAIL_ADDRESS", "test@example.com")
+        monkeypatch.setattr(main_module.C, "EMAIL_PASSWORD", "test_password")
+
+        # Set up mocks
+        monkeypatch.setattr(main_module.C, "HISTORY_FILE", mock_history_file["path"])
+        monkeypatch.setattr(
+            main_module, "get_coingecko_global", lambda: (44.0, 20.0, 2000000000000)
+        )
+        monkeypatch.setattr(main_module, "get_fear_greed", lambda url: 95)
+        monkeypatch.setattr(
+            main_module, "get_m2_series", lambda: [100.0, 100.001, 100.002]
+        )
+        monkeypatch.setattr(main_module, "google_trends_hype", lambda: True)
+        monkeypatch.setattr(main_module, "coinbase_app_top", lambda: True)
+        monkeypatch.setattr(main_module, "check_alt_pullback", lambda ratio: True)
+
+        # Run the main function
+        main_module.main()
+
+        # Should have 4 email calls (3 individual alerts + full exit)
+        send_message = mock_smtp.return_value.__enter__.return_value.send_message
+        assert send_message.call_count == 4
+        # All alerts share a single SMTP session
+        assert mock_smtp.call_count == 1
+
+        # Verify the full exit email was sent
+        subjects = [call.args[0]["Subject"] for call in send_message.call_args_list]
+        assert "🚨 FULL EXIT SIGNAL" in subjects
+
+    def test_main_alerts_survive_pullback_check_failure(
+        self, mock_requests, mock_smtp, monkeypatch
+    ):
+        """Test that a failing history update does not drop the other alerts."""
+        monkeypatch.setattr(main_module.C, "EMAIL_ADDRESS", "test@example.com")
+        monkeypatch.setattr(main_module.C, "EMAIL_PASSWORD", "test_password")
+
+        def broken_history(ratio):
+            raise OSError("history file unavailable")
+
+        monkeypatch.setattr(
+            main_module, "get_coingecko_global", lambda: (44.0, 20.0, 2000000000000)
+        )
+        monkeypatch.setattr(main_module, "get_fear_greed", lambda url: 50)
+        monkeypatch.setattr(main_module, "get_m2_series", lambda: [100.0, 110.0, 120.0])
+        monkeypatch.setattr(main_module, "check_alt_pullback", broken_history)
+
+        main_module.main()
+
+        send_message = mock_smtp.return_value.__enter__.return_value.send_message
+        subjects = [call.args[0]["Subject"] for call in send_message.call_args_list]
+        assert subjects == ["⚠️ Trim Risky Alts"]
 
     def test_main_no_triggers(self, mock_requests, mock_smtp, monkeypatch):
         """Test full monitoring cycle with no triggers active."""
-        # Patch the email address to match the expected value
-        monkeypatch.setenv("EMAIL_ADDRESS", "test@example.com")
-        monkeypatch.setenv("EMAIL_PASSWORD", "test_password")
-
-        # Reload the module to pick up the mocked environment variables
-        import importlib
-        import main as main_module
-
-        importlib.reload(main_module)
-
-        # Set up mocks for the reloaded module
-        with patch(
-            "main.get_coingecko_global",
-            return_value=(46.0, 20.0, 2000000000000),
-        ):
-            with patch("main.get_fear_greed", return_value=50):
-                with patch("main.get_m2_series", return_value=[100.0, 110.0, 120.0]):
-                    with patch("main.google_trends_hype", return_value=False):
-                        with patch("main.coinbase_app_top", return_value=False):
-                            with patch("main.check_alt_pullback", return_value=False):
-                                # Run the main function
-                                main_module.main()
-
-                                # Should have no email calls
-                                assert mock_smtp.call_count == 0
+        # Patch the email credentials to match the expected values
+        monkeypatch.setattr(main_module.C, "EMAIL_ADDRESS", "test@example.com")
+        monkeypatch.setattr(main_module.C, "EMAIL_PASSWORD", "test_password")
+
+        # Set up mocks
+        monkeypatch.setattr(
+            main_module, "get_coingecko_global", lambda: (46.0, 20.0, 2000000000000)
+        )
+        monkeypatch.setattr(main_module, "get_fear_greed", lambda url: 50)
+        monkeypatch.setattr(main_module, "get_m2_series", lambda: [100.0, 110.0, 120.0])
+        monkeypatch.setattr(main_module, "google_trends_hype", lambda: False)
+        monkeypatch.setattr(main_module, "coinbase_app_top", lambda: False)
+        monkeypatch.setattr(main_module, "check_alt_pullback", lambda ratio: False)
+
+        # Run the main function
+        main_module.main()
+
+        # Should have no email calls
+        assert mock_smtp.call_count == 0
+
+    def test_main_skips_charts_without_alerts(
+        self, mock_requests, mock_smtp, mock_history_file, monkeypatch
+    ):
+        """Test that charts are only rendered when an alert is sent."""
+        mock_chart = MagicMock()
+        monkeypatch.setattr(main_module.C, "HISTORY_FILE", mock_history_file["path"])
+        monkeypatch.setattr(
+            main_module, "get_coingecko_global", lambda: (46.0, 20.0, 2000000000000)
+        )
+        monkeypatch.setattr(main_module, "get_m2_series", lambda: [100.0, 110.0, 120.0])
+        monkeypatch.setattr(main_module, "check_alt_pullback", lambda ratio: False)
+        monkeypatch.setattr(main_module, "create_chart", mock_chart)
+
+        main()
+
+        mock_chart.assert_not_called()
+
+    def test_main_skips_hype_checks_without_exit_preconditions(
+        self, mock_requests, mock_smtp, mock_history_file, monkeypatch
+    ):
+        """Test that social hype sources are not fetched when a full exit is impossible."""
+        mock_hype = MagicMock()
+        mock_cb = MagicMock()
+        monkeypatch.setattr(main_module.C, "HISTORY_FILE", mock_history_file["path"])
+        monkeypatch.setattr(
+            main_module, "get_coingecko_global", lambda: (46.0, 20.0, 2000000000000)
+        )
+        monkeypatch.setattr(main_module, "check_alt_pullback", lambda ratio: False)
+        monkeypatch.setattr(main_module, "google_trends_hype", mock_hype)
+        monkeypatch.setattr(main_module, "coinbase_app_top", mock_cb)
+
+        main()
+
+        mock_hype.assert_not_called()
+        mock_cb.assert_not_called()
+
+    def test_main_skips_hype_checks_without_extreme_greed(
+        self, mock_requests, mock_smtp, mock_history_file, monkeypatch
+    ):
+        """Test that social hype sources are not fetched below extreme greed."""
+        mock_hype = MagicMock()
+        mock_cb = MagicMock()
+        monkeypatch.setattr(main_module.C, "HISTORY_FILE", mock_history_file["path"])
+        monkeypatch.setattr(
+            main_module, "get_coingecko_global", lambda: (44.0, 20.0, 2000000000000)
+        )
+        monkeypatch.setattr(main_module, "get_m2_series", lambda: [100.0, 100.0, 100.0])
+        monkeypatch.setattr(main_module, "get_fear_greed", lambda url: 85)
+        monkeypatch.setattr(main_module, "check_alt_pullback", lambda ratio: False)
+        monkeypatch.setattr(main_module, "google_trends_hype", mock_hype)
+        monkeypatch.setattr(main_module, "coinbase_app_top", mock_cb)
+
+        main()
+
+        mock_hype.assert_not_called()
+        mock_cb.assert_not_called()
 
     @pytest.mark.parametrize(
         "btc_dom,m2_flat,fear_greed,social_hype,coinbase_top,alt_pullback,expected_emails",
@@ -266,65 +471,58 @@ class TestMainMonitoring:
         expected_emails,
     ):
         """Test main function with various combinations of conditions."""
-        # Patch the email address to match the expected value
-        monkeypatch.setenv("EMAIL_ADDRESS", "test@example.com")
-        monkeypatch.setenv("EMAIL_PASSWORD", "test_password")
-
-        # Reload the module to pick up the mocked environment variables
-        import importlib
-        import main as main_module
-
-        importlib.reload(main_module)
-
-        # Set up mocks for the reloaded module
-        with patch("main.C.HISTORY_FILE", mock_history_file["path"]):
-            with patch(
-                "main.get_coingecko_global",
-                return_value=(btc_dom, 20.0, 2000000000000),
-            ):
-                with patch("main.get_fear_greed", return_value=fear_greed):
-                    with patch("main.is_m2_flat", return_value=m2_flat):
-                        with patch("main.google_trends_hype", return_value=social_hype):
-                            with patch(
-                                "main.coinbase_app_top",
-                                return_value=coinbase_top,
-                            ):
-                                with patch(
-                                    "main.check_alt_pullback",
-                                    return_value=alt_pullback,
-                                ):
-                                    # Run the main function
-                                    main_module.main()
-
-                                    # Reset the mock to check only the call count for send_message
-                                    mock_smtp.reset_mock()
-
-                                    # Run the main function again
-                                    main_module.main()
-
-                                    # Verify the expected number of emails
-                                    if expected_emails > 0:
-                                        assert (
-                                            mock_smtp.return_value.__enter__.return_value.send_message.call_count
-                                            == expected_emails
-                                        )
-                                    else:
-                                        assert mock_smtp.call_count == 0
-
-    def test_main_with_api_errors(self, mock_smtp, monkeypatch):
+        # Patch the email credentials to match the expected values
+        monkeypatch.setattr(main_module.C, "EMAIL_ADDRESS", "test@example.com")
+        monkeypatch.setattr(main_module.C, "EMAIL_PASSWORD", "test_password")
+
+        # Set up mocks
+        monkeypatch.setattr(main_module.C, "HISTORY_FILE", mock_history_file["path"])
+        monkeypatch.setattr(
+            main_module, "get_coingecko_global", lambda: (btc_dom, 20.0, 2000000000000)
+        )
+        monkeypatch.setattr(main_module, "get_fear_greed", lambda url: fear_greed)
+        monkeypatch.setattr(main_module, "is_m2_flat", lambda vals: m2_flat)
+        monkeypatch.setattr(main_module, "google_trends_hype", lambda: social_hype)
+        monkeypatch.setattr(main_module, "coinbase_app_top", lambda: coinbase_top)
+        monkeypatch.setattr(
+            main_module, "check_alt_pullback", lambda ratio: alt_pullback
+        )
+
+        # Run the main function
+        main_module.main()
+
+        # Verify the expected number of emails
+        if expected_emails > 0:
+            send_message = mock_smtp.return_value.__enter__.return_value.send_message
+            assert send_message.call_count == expected_emails
+        else:
+            assert mock_smtp.call_count == 0
+
+    def test_main_with_api_errors(self, mock_requests_error, mock_smtp):
         """Test main function handling of API errors."""
-        # Patch the email address to match the expected value
-        monkeypatch.setenv("EMAIL_ADDRESS", "test@example.com")
-        monkeypatch.setenv("EMAIL_PASSWORD", "test_password")
+        # The main function should propagate market data errors before any email
+        with pytest.raises(requests.exceptions.RequestException):
+            main_module.main()
+        mock_smtp.assert_not_called()
+
+
+class TestRunForever:
+    """Tests for the long-running monitor loop."""
+
+    def test_run_forever_survives_failed_cycle(self):
+        """Test that a failing check is logged and the loop keeps running."""
+        import threading
+
+        stop = threading.Event()
+        calls = []
 
-        # Reload the module to pick up the mocked environment variables
-        import importlib
-        import main as main_module
+        def fake_main():
+            calls.append(1)
+            if len(calls) == 1:
+                raise requests.exceptions.RequestException("API error")
+            stop.set()
 
-        importlib.reload(main_module)
+        with patch("main.main", side_effect=fake_main):
+            main_module.run_forever(0, stop)
 
-        # The main function should handle API errors gracefully
-        with patch("main.get_coingecko_global") as mock_get:
-            mock_get.side_effect = requests.exceptions.RequestException("API error")
-            with pytest.raises(requests.exceptions.RequestException):
-                main_module.main()
+        assert len(calls) == 2